@@ -8,6 +8,8 @@ __version__ = "0.1.0"
 import sys
 import weakref
 from collections import defaultdict
+from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Union
 from uuid import UUID
@@ -43,9 +45,14 @@ class _EntryList(list):
         if old_type in self.__known_types and old_type in self._type:
             self._type.remove(old_type)
 
-    def reset_type(self, default_type: str = None):
+    def reset_type(self, default_type: str = None) -> bool:
+        """
+        Replace the types of this entry with `default_type`. Returns whether the types have changed.
+        """
+        old_type = self._type
         self._type = []
-        self.type = default_type
+        self.add_type(default_type)
+        return self._type != old_type
 
     @property
     def type(self) -> List[str]:
@@ -53,8 +60,16 @@ class _EntryList(list):
 
     @type.setter
     def type(self, value: str):
+        self.add_type(value)
+
+    def add_type(self, value: str) -> bool:
+        """
+        Add `value` to the types of this entry. Returns whether it was added, i.e. the entry has changed.
+        """
         if value in self.__known_types and value not in self._type:
             self._type.append(value)
+            return True
+        return False
 
     @property
     def is_argument(self) -> bool:
@@ -83,12 +98,22 @@ class UniqueIdMap(WeakKeyDictionary):
 
 
 uniqueidmap = UniqueIdMap()
+# Only these can already be an id, anything else goes straight to `unique_id` rather than failing `validate_id`.
+_ID_TYPES = (UUID, str, bytes)
 
 
 class Graph:
     def __init__(self):
         self._store = weakref.WeakValueDictionary()
         self.__graph_dict = {}
+        # Type -> {key: position} of the vertices of that type. Rebuilt lazily after any vertex/type change.
+        self.__type_index = {}
+        # Bumped whenever an edge may have changed, so routes through the graph can be cached against it.
+        self.__generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
 
     def vertices(self) -> List[int]:
         """returns the vertices of a graph"""
@@ -100,27 +125,49 @@ class Graph:
 
     @property
     def argument_objs(self) -> List[int]:
-        return self._nested_get("argument")
+        return list(self._nested_index("argument"))
 
     @property
     def created_objs(self) -> List[int]:
-        return self._nested_get("created")
+        return list(self._nested_index("created"))
 
     @property
     def created_internal(self) -> List[int]:
-        return self._nested_get("created_internal")
+        return list(self._nested_index("created_internal"))
 
     @property
     def returned_objs(self) -> List[int]:
-        return self._nested_get("returned")
+        return list(self._nested_index("returned"))
+
+    @property
+    def argument_index(self) -> Dict[int, int]:
+        return self._nested_index("argument")
+
+    @property
+    def created_index(self) -> Dict[int, int]:
+        return self._nested_index("created")
+
+    @property
+    def returned_index(self) -> Dict[int, int]:
+        return self._nested_index("returned")
 
     def get_item_by_key(self, item_id: int) -> object:
-        if item_id in self._store.keys():
+        if item_id in self._store:
             return self._store[item_id]
         raise ValueError
 
+    def get_items_by_keys(self, item_ids: Iterable[int]) -> List[object]:
+        """
+        `get_item_by_key` for several keys at once.
+        """
+        store = self._store
+        try:
+            return [store[item_id] for item_id in item_ids]
+        except KeyError:
+            raise ValueError
+
     def is_known(self, vertex: object) -> bool:
-        return self.convert_id(vertex).int in self._store.keys()
+        return self.convert_id(vertex).int in self._store
 
     def find_type(self, vertex: object) -> List[str]:
         if self.is_known(vertex):
@@ -128,15 +175,34 @@ class Graph:
             return self.__graph_dict[oid].type
 
     def reset_type(self, obj, default_type: str):
-        if self.convert_id(obj).int in self.__graph_dict.keys():
-            self.__graph_dict[self.convert_id(obj).int].reset_type(default_type)
+        entry = self.__graph_dict.get(self.convert_id(obj).int)
+        if entry is not None and entry.reset_type(default_type):
+            self.__type_index.clear()
 
     def change_type(self, obj, new_type: str):
-        if self.convert_id(obj).int in self.__graph_dict.keys():
-            self.__graph_dict[self.convert_id(obj).int].type = new_type
+        entry = self.__graph_dict.get(self.convert_id(obj).int)
+        if entry is not None and entry.add_type(new_type):
+            self.__type_index.clear()
+
+    def classify_returned(self, items: Iterable[object]):
+        """
+        Mark each of `items` as returned, adding the ones which are not in the graph yet. `None` items are skipped.
+        """
+        for item in items:
+            if item is None:
+                continue
+            oid = self.convert_id(item).int
+            if oid not in self._store:
+                self.add_vertex(item, obj_type="returned")
+            elif oid in self.__graph_dict and self.__graph_dict[oid].add_type("returned"):
+                self.__type_index.clear()
 
     def add_vertex(self, obj: object, obj_type: str = None):
+        self.__type_index.clear()
         oid = self.convert_id(obj).int
+        if oid in self.__graph_dict:
+            # Re-adding a vertex drops its edges
+            self.__generation += 1
         self._store[oid] = obj
         self.__graph_dict[oid] = _EntryList()  # Enhanced list of keys
         self.__graph_dict[oid].finalizer = weakref.finalize(
@@ -149,6 +215,7 @@ class Graph:
         vertex2 = self.convert_id(end_obj).int
         if vertex1 in self.__graph_dict.keys():
             self.__graph_dict[vertex1].append(vertex2)
+            self.__generation += 1
         else:
             raise AttributeError
 
@@ -183,10 +250,13 @@ class Graph:
             and vertex2 in self.__graph_dict[vertex1]
         ):
             del self.__graph_dict[vertex1][self.__graph_dict[vertex1].index(vertex2)]
+            self.__generation += 1
 
     def prune(self, key: int):
         if key in self.__graph_dict.keys():
             del self.__graph_dict[key]
+            self.__type_index.clear()
+            self.__generation += 1
 
     def find_isolated_vertices(self) -> list:
         """returns a list of isolated vertices."""
@@ -299,17 +369,34 @@ class Graph:
                 extracted_list.append(key)
         return extracted_list
 
+    def _nested_index(self, obj_type: str) -> Dict[int, int]:
+        """
+        Map each key of a given type to its position amongst the vertices of that type. The returned dict is
+        shared until the graph next changes, so it must not be modified.
+        """
+        index = self.__type_index.get(obj_type)
+        if index is None:
+            index = {key: position for position, key in enumerate(self._nested_get(obj_type))}
+            self.__type_index[obj_type] = index
+        return index
+
     @staticmethod
     def convert_id(input_value) -> UUID:
         """Sometimes we're dopy and"""
-        if not validate_id(input_value):
+        if not isinstance(input_value, _ID_TYPES) or not validate_id(input_value):
             input_value = unique_id(input_value)
         return input_value
 
+    @classmethod
+    def convert_ids(cls, input_values: Iterable) -> List[UUID]:
+        """`convert_id` for several values at once."""
+        convert_id = cls.convert_id
+        return [convert_id(input_value) for input_value in input_values]
+
     @staticmethod
     def convert_id_to_key(input_value: Union[object, UUID]) -> int:
         """Sometimes we're dopy and"""
-        if not validate_id(input_value):
+        if not isinstance(input_value, _ID_TYPES) or not validate_id(input_value):
             input_value: UUID = unique_id(input_value)
         return input_value.int
 
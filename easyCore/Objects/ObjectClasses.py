@@ -19,6 +19,7 @@ from typing import TypeVar
 
 from easyCore import borg
 from easyCore.Utils.classTools import addLoggedProp
+from easyCore.Utils.Hugger.Property import internal_access
 
 from .core import ComponentSerializer
 from .Variable import Descriptor
@@ -284,24 +285,30 @@ class BaseObj(BasedBase):
     def __setattr__(self, key: str, value: BV) -> None:
         # Assume that the annotation is a ClassVar
         old_obj = None
-        if (
-            hasattr(self.__class__, "__annotations__")
-            and key in self.__class__.__annotations__
-            and hasattr(self.__class__.__annotations__[key], "__args__")
-            and issubclass(
-                getattr(value, "__old_class__", value.__class__),
-                self.__class__.__annotations__[key].__args__,
-            )
-        ):
-            if issubclass(type(getattr(self, key, None)), (BasedBase, Descriptor)):
-                old_obj = self.__getattribute__(key)
-                self._borg.map.prune_vertex_from_edge(self, old_obj)
-            self._add_component(key, value)
-        else:
-            if hasattr(self, key) and issubclass(type(value), (BasedBase, Descriptor)):
-                old_obj = self.__getattribute__(key)
-                self._borg.map.prune_vertex_from_edge(self, old_obj)
-                self._borg.map.add_edge(self, value)
+        # Our own reads and graph updates are never logged, flag them so the accessors don't have to find their caller.
+        # The set itself is left unflagged, setters and their callbacks may touch other objects which must be logged.
+        token = internal_access.set(True)
+        try:
+            if (
+                hasattr(self.__class__, "__annotations__")
+                and key in self.__class__.__annotations__
+                and hasattr(self.__class__.__annotations__[key], "__args__")
+                and issubclass(
+                    getattr(value, "__old_class__", value.__class__),
+                    self.__class__.__annotations__[key].__args__,
+                )
+            ):
+                if issubclass(type(getattr(self, key, None)), (BasedBase, Descriptor)):
+                    old_obj = self.__getattribute__(key)
+                    self._borg.map.prune_vertex_from_edge(self, old_obj)
+                self._add_component(key, value)
+            else:
+                if hasattr(self, key) and issubclass(type(value), (BasedBase, Descriptor)):
+                    old_obj = self.__getattribute__(key)
+                    self._borg.map.prune_vertex_from_edge(self, old_obj)
+                    self._borg.map.add_edge(self, value)
+        finally:
+            internal_access.reset(token)
         super(BaseObj, self).__setattr__(key, value)
         # Update the interface bindings if something changed (BasedBase and Descriptor)
         if old_obj is not None:
@@ -8,8 +8,8 @@ __version__ = "0.1.0"
 
 
 class CoreError(Exception):
-    pass
+    __slots__ = ()
 
 
 class CoreSetException(CoreError):
-    pass
+    __slots__ = ()
@@ -5,36 +5,76 @@
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-import inspect
 import sys
 from abc import ABCMeta
 from abc import abstractmethod
+from collections import deque
+from functools import lru_cache
+from typing import Callable
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 from easyCore.Utils.classUtils import singleton
 
+_IMMUTABLE_TYPES = (int, float, complex, str, tuple, frozenset, bytes, property)
+_IMMUTABLE_TYPE_SET = frozenset(_IMMUTABLE_TYPES)
+
+# Dotted caller names keyed on (code object, class name of `self`), which fully determine the name. The class name is
+# used rather than the class, as `easyCore` objects get a class per instance which must not be kept alive here.
+_CALLER_CACHE = {}
+_CALLER_CACHE_SIZE = 1024
+
 
 @singleton
 class Store:
-    __log = []
+    __slots__ = (
+        "log",
+        "create_list",
+        "unique_args",
+        "unique_rets",
+        "create_index",
+        "unique_args_index",
+        "unique_rets_index",
+        "var_ident",
+        "ret_ident",
+    )
+
+    __log = deque()
+    __create_list = set()
+    __unique_args = set()
+    __unique_rets = set()
+    __create_index = {}
+    __unique_args_index = {}
+    __unique_rets_index = {}
     __var_ident = "var_"
     __ret_ident = "ret_"
 
     def __init__(self):
-        self.log = self.__log  # TODO Async problem?
+        # `deque.append` is atomic, so logging from several threads needs no lock
+        self.log = self.__log
+        # Membership is tracked in sets, the insertion position of each id is kept alongside.
+        self.create_list = self.__create_list
+        self.unique_args = self.__unique_args
+        self.unique_rets = self.__unique_rets
+        self.create_index = self.__create_index
+        self.unique_args_index = self.__unique_args_index
+        self.unique_rets_index = self.__unique_rets_index
         self.var_ident = self.__var_ident
         self.ret_ident = self.__ret_ident
 
-    @staticmethod
-    def get_defaults() -> dict:
+    @classmethod
+    def get_defaults(cls) -> dict:
         return {
-            "log": Store.__log,
-            "create_list": Store.__create_list,
-            "unique_args": Store.__unique_args,
-            "unique_rets": Store.__unique_rets,
-            "var_ident": Store.__var_ident,
-            "ret_ident": Store.__ret_ident,
+            "log": deque(),
+            "create_list": set(),
+            "unique_args": set(),
+            "unique_rets": set(),
+            "create_index": {},
+            "unique_args_index": {},
+            "unique_rets_index": {},
+            "var_ident": cls.__var_ident,
+            "ret_ident": cls.__ret_ident,
         }
 
     def append_log(self, log_entry: str):
@@ -45,6 +85,7 @@ class ScriptManager:
     def __init__(self, enabled=True):
         self._store = Store()
         self._enabled = enabled
+        self._toggle_hooks: List[Callable[[bool], None]] = []
 
     @property
     def enabled(self) -> bool:
@@ -52,17 +93,29 @@ class ScriptManager:
 
     @enabled.setter
     def enabled(self, value: bool):
+        changed = value != self._enabled
         self._enabled = value
+        if changed:
+            for hook in self._toggle_hooks:
+                hook(value)
+
+    def add_toggle_hook(self, hook: Callable[[bool], None]):
+        """
+        Register a callable which is given the new state whenever scripting is enabled or disabled.
+        """
+        self._toggle_hooks.append(hook)
 
     def history(self) -> List[str]:
-        return self._store.log
+        return list(self._store.log)
 
     def reset_history(self):
-        defaults = Store.get_defaults()
+        defaults = self._store.get_defaults()
         for key, item in defaults.items():
             setattr(self._store, key, item)
 
     def append_log(self, log_entry: str):
+        if not self._enabled:
+            return
         self._store.log.append(log_entry)
 
 
@@ -71,7 +124,7 @@ class Hugger(metaclass=ABCMeta):
         self._store = Store()
 
     @property
-    def log(self) -> list:
+    def log(self) -> deque:
         return self._store.log
 
     @abstractmethod
@@ -89,12 +142,8 @@ class PatcherFactory(Hugger, metaclass=ABCMeta):
 
     @staticmethod
     def is_mutable(arg) -> bool:
-        ret = True
-        if isinstance(
-            arg, (int, float, complex, str, tuple, frozenset, bytes, property)
-        ):
-            ret = False
-        return ret
+        # Exact type hits are the common case, `isinstance` is only needed for subclasses
+        return type(arg) not in _IMMUTABLE_TYPE_SET and not isinstance(arg, _IMMUTABLE_TYPES)
 
     @staticmethod
     def _caller_name(skip: int = 2):
@@ -105,18 +154,26 @@ class PatcherFactory(Hugger, metaclass=ABCMeta):
         https://gist.github.com/techtonik/2151727#gistcomment-2333747
         """
 
-        def stack_(frame):
-            framelist = []
-            while frame:
-                framelist.append(frame)
-                frame = frame.f_back
-            return framelist
-
-        stack = stack_(sys._getframe(1))
-        start = 0 + skip
-        if len(stack) < start + 1:
+        parentframe = sys._getframe(1)
+        for _ in range(skip):
+            if parentframe is None:
+                break
+            parentframe = parentframe.f_back
+        if parentframe is None:
             return ""
-        parentframe = stack[start]
+
+        # The class name is `None` when the caller has no `self`, which is distinct from a class called "None"
+        key = (
+            parentframe.f_code,
+            parentframe.f_locals["self"].__class__.__name__ if "self" in parentframe.f_locals else None,
+        )
+        cached = _CALLER_CACHE.get(key)
+        if cached is not None:
+            del parentframe
+            return cached
+
+        # `inspect` is only needed once something is being patched
+        import inspect
 
         name = []
         module = inspect.getmodule(parentframe)
@@ -134,50 +191,46 @@ class PatcherFactory(Hugger, metaclass=ABCMeta):
         if codename != "<module>":  # top level usually
             name.append(codename)  # function or a method
         del parentframe
-        return ".".join(name)
+        dotted_name = ".".join(name)
+        if len(_CALLER_CACHE) >= _CALLER_CACHE_SIZE:
+            # Code objects can be generated at runtime, so don't let the cache grow without bound
+            _CALLER_CACHE.clear()
+        _CALLER_CACHE[key] = dotted_name
+        return dotted_name
+
+    def _is_untracked(self, this_id: int) -> bool:
+        store = self._store
+        return this_id not in store.unique_rets and this_id not in store.create_list and this_id not in store.unique_args
 
     def _append_args(self, *args, **kwargs):
-        def check(res):
-            return (
-                id(res) not in self._store.unique_rets
-                and id(res) not in self._store.create_list
-                and id(res) not in self._store.unique_args
-            )
-
-        for arg in args:
-            if self.is_mutable(arg) and check(arg):
-                self._store.unique_args.append(id(arg))
-        for item in kwargs.values():
-            if self.is_mutable(item) and check(item):
-                self._store.unique_args.append(id(item))
+        for arg in (*args, *kwargs.values()):
+            if self.is_mutable(arg) and self._is_untracked(id(arg)):
+                self._add_id(self._store.unique_args, self._store.unique_args_index, id(arg))
+
+    @staticmethod
+    def _add_id(id_set: set, id_index: dict, this_id: int):
+        id_index[this_id] = len(id_index)
+        id_set.add(this_id)
 
     def _append_create(self, obj):
         this_id = id(obj)
         if this_id not in self._store.create_list:
-            self._store.create_list.append(this_id)
+            self._add_id(self._store.create_list, self._store.create_index, this_id)
 
     def _append_result(self, result) -> int:
         ret = 0
-
-        def check(res):
-            return (
-                id(res) not in self._store.unique_rets
-                and id(res) not in self._store.create_list
-                and id(res) not in self._store.unique_args
-            )
-
-        if isinstance(result, type(None)):
+        if result is None:
             return ret
         elif isinstance(result, tuple):
             for res in result:
-                # if self.is_mutable(res) and check(res):
-                if check(res):
-                    self._store.unique_rets.append(id(res))
+                # if self.is_mutable(res) and self._is_untracked(id(res)):
+                if self._is_untracked(id(res)):
+                    self._add_id(self._store.unique_rets, self._store.unique_rets_index, id(res))
             ret = len(result)
         else:
-            # if self.is_mutable(result) and check(result):
-            if check(result):
-                self._store.unique_rets.append(id(result))
+            # if self.is_mutable(result) and self._is_untracked(id(result)):
+            if self._is_untracked(id(result)):
+                self._add_id(self._store.unique_rets, self._store.unique_rets_index, id(result))
             ret = 1
         return ret
 
@@ -193,13 +246,19 @@ class PatcherFactory(Hugger, metaclass=ABCMeta):
         }
         return this_id, option
 
-    def _get_position(self, query: str, item) -> int:
-        this_id, option = self.__options(item)
-        in_list = self._in_list(query, item)
-        index = None
-        if in_list:
-            index = option.get(query).index(this_id)
-        return index
+    def __positions(self, query: str) -> dict:
+        option = {
+            "create_list": self._store.create_index,
+            "return_list": self._store.unique_rets_index,
+            "input_list": self._store.unique_args_index,
+        }
+        return option.get(query, {})
+
+    def _get_position(self, query: str, item) -> Optional[int]:
+        """
+        Position of `item` in the `query` list, or `None` if it is not in there.
+        """
+        return self.__positions(query).get(id(item))
 
     def _in_list(self, query: str, item) -> bool:
         this_id, option = self.__options(item)
@@ -207,18 +266,26 @@ class PatcherFactory(Hugger, metaclass=ABCMeta):
 
     @staticmethod
     def _get_class_that_defined_method(method_in) -> classmethod:
+        import inspect
+
         if inspect.ismethod(method_in):
-            for cls in inspect.getmro(method_in.__self__.__class__):
-                if cls.__dict__.get(method_in.__name__) is method_in:
+            name = method_in.__name__
+            for cls in type(method_in.__self__).__mro__:
+                if vars(cls).get(name) is method_in:
                     return cls
             method_in = method_in.__func__  # fallback to __qualname__ parsing
         if inspect.isfunction(method_in):
-            class_name = method_in.__qualname__.split(".<locals>", 1)[0].rsplit(".", 1)[
-                0
-            ]
-            try:
-                cls = getattr(inspect.getmodule(method_in), class_name)
-            except AttributeError:
-                cls = method_in.__globals__.get(class_name)
-            if isinstance(cls, type):
-                return cls
+            return _get_class_from_qualname(method_in)
+
+
+@lru_cache(maxsize=4096)
+def _get_class_from_qualname(function_in):
+    import inspect
+
+    class_name = function_in.__qualname__.split(".<locals>", 1)[0].rsplit(".", 1)[0]
+    try:
+        cls = getattr(inspect.getmodule(function_in), class_name)
+    except AttributeError:
+        cls = function_in.__globals__.get(class_name)
+    if isinstance(cls, type):
+        return cls
@@ -6,15 +6,20 @@ __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
 import sys
-from functools import wraps
-from typing import Any
+import weakref
+from contextvars import ContextVar
 from typing import Callable
-from typing import List
+from typing import Tuple
 
 from easyCore import borg
 from easyCore.Utils.Hugger.Hugger import PatcherFactory
 from easyCore.Utils.Hugger.Hugger import Store
 
+# Set while a `BaseObj` is working on its own logged properties, so their accessors can skip looking up the caller.
+internal_access: ContextVar[bool] = ContextVar("internal_access", default=False)
+# Classes which have had a `LoggedProperty` installed on them.
+_logged_classes = weakref.WeakSet()
+
 
 class LoggedProperty(property):
     """
@@ -25,133 +30,166 @@ class LoggedProperty(property):
     """
 
     _borg = borg
+    # The script manager lives as long as the borg, so bind it once rather than resolving `borg.script` per access.
+    _script = borg.script
+    _store = Store()
 
     def __init__(self, *args, get_id=None, my_self=None, test_class=None, **kwargs):
         super(LoggedProperty, self).__init__(*args, **kwargs)
         self._get_id = get_id
         self._my_self = my_self
         self.test_class = test_class
+        # Both are fixed for the lifetime of `my_self`. The graph key is resolved on first use.
+        self._my_self_cls_lower = my_self.__class__.__name__.lower() if my_self is not None else ""
+        self._my_self_key = None
+        # The plain `property` set in place of this one while scripting is disabled, made on first use.
+        self._plain = None
+
+    def install(self, klass, name: str):
+        """
+        Set this property as `name` on `klass`. While scripting is disabled a plain `property` with the same
+        accessors is set instead, so attribute access pays nothing for logging.
+
+        :param klass: Class to set the property on
+        :param name: Attribute name of the property
+        """
+        logged = klass.__dict__.get("_logged_properties")
+        if logged is None:
+            logged = {}
+            setattr(klass, "_logged_properties", logged)
+            _logged_classes.add(klass)
+        logged[name] = self
+        setattr(klass, name, self if self._script.enabled else self._as_property())
+
+    def _as_property(self) -> property:
+        if self._plain is None:
+            self._plain = property(self.fget, self.fset, self.fdel, self.__doc__)
+        return self._plain
+
+    def _get_my_self_key(self) -> int:
+        if self._my_self_key is None:
+            self._my_self_key = borg.map.convert_id_to_key(self._my_self)
+        return self._my_self_key
 
     @staticmethod
     def _caller_class(test_class, skip: int = 1):
-        def stack_(frame):
-            frame_list = []
-            while frame:
-                frame_list.append(frame)
-                frame = frame.f_back
-            return frame_list
-
-        stack: List[Any] = stack_(sys._getframe(1))
-        start = 0 + skip
-        if len(stack) < start + 1:
+        try:
+            # Frame 1 is whoever called us, so hop straight to `skip` frames beyond it.
+            parent_frame = sys._getframe(1 + skip)
+        except ValueError:
             return ""
-        parent_frame = stack[start]
-        test = False
-        if "self" in parent_frame.f_locals:
-            test = issubclass(parent_frame.f_locals["self"].__class__, test_class)
-        return test
+        f_locals = parent_frame.f_locals
+        return "self" in f_locals and isinstance(f_locals["self"], test_class)
 
     def __get__(self, instance, owner=None):
-        if not borg.script.enabled:
-            return super(LoggedProperty, self).__get__(instance, owner)
-        test = self._caller_class(self.test_class)
-        res = super(LoggedProperty, self).__get__(instance, owner)
-
-        def result_item(item_to_be_resulted):
-            if item_to_be_resulted is None:
-                return None
-            if borg.map.is_known(item_to_be_resulted):
-                borg.map.change_type(item_to_be_resulted, "returned")
-            else:
-                borg.map.add_vertex(item_to_be_resulted, obj_type="returned")
+        res = property.__get__(self, instance, owner)
+        # Cheap rejections first, the caller check has to inspect the stack.
+        if not self._script.enabled or self._get_id is None or self._my_self is None:
+            return res
+        if internal_access.get() or self._caller_class(self.test_class):
+            return res
 
-        if not test and self._get_id is not None and self._my_self is not None:
-            if not isinstance(res, list):
-                result_item(res)
-            else:
-                for item in res:
-                    result_item(item)
-            Store().append_log(self.makeEntry("get", res))
-            if borg.debug:  # noqa: S1006
-                print(
-                    f"I'm {self._my_self} and {self._get_id} has been called from the outside!"
-                )
+        borg.map.classify_returned(res if type(res) is list else (res,))
+        self._store.append_log(self._make_get_entry(res))
+        if borg.debug:  # noqa: S1006
+            print(
+                f"I'm {self._my_self} and {self._get_id} has been called from the outside!"
+            )
         return res
 
     def __set__(self, instance, value):
-        if not borg.script.enabled:
-            return super().__set__(instance, value)
-        test = self._caller_class(self.test_class)
-        if not test and self._get_id is not None and self._my_self is not None:
-            Store().append_log(self.makeEntry("set", value))
+        if (
+            self._script.enabled
+            and self._get_id is not None
+            and self._my_self is not None
+            and not internal_access.get()
+            and not self._caller_class(self.test_class)
+        ):
+            self._store.append_log(self._make_set_entry())
             if borg.debug:  # noqa: S1006
                 print(
                     f"I'm {self._my_self} and {self._get_id} has been set to {value} from the outside!"
                 )
-        return super().__set__(instance, value)
+        return property.__set__(self, instance, value)
 
     def makeEntry(self, log_type, returns, *args, **kwargs) -> str:
-        temp = ""
+        if log_type == "get":
+            return self._make_get_entry(returns)
+        if log_type == "set":
+            return self._make_set_entry(*args)
+        print(f"{log_type} is not implemented yet. Sorry")
+        return "\n"
+
+    def _make_get_entry(self, returns) -> str:
+        parts = []
         if returns is None:
             returns = []
-        if not isinstance(returns, list):
+        if type(returns) is not list:
             returns = [returns]
-        if log_type == "get":
-            for var in returns:
-                if borg.map.convert_id_to_key(var) in borg.map.returned_objs:
-                    index = borg.map.returned_objs.index(
-                        borg.map.convert_id_to_key(var)
-                    )
-                    temp += f"{Store().var_ident}{index}, "
-            if len(returns) > 0:
-                temp = temp[:-2]
-                temp += " = "
-            if borg.map.convert_id_to_key(self._my_self) in borg.map.created_objs:
-                # for edge in route[::-1]:
-                index = borg.map.created_objs.index(
-                    borg.map.convert_id_to_key(self._my_self)
-                )
-                temp += (
-                    f"{self._my_self.__class__.__name__.lower()}_{index}.{self._get_id}"
-                )
-            if borg.map.convert_id(self._my_self) in borg.map.created_internal:
-                # We now have to trace....
-                route = borg.map.reverse_route(self._my_self)  # noqa: F841
-                index = borg.map.created_objs.index(
-                    borg.map.convert_id_to_key(self._my_self)
-                )
-                temp += (
-                    f"{self._my_self.__class__.__name__.lower()}_{index}.{self._get_id}"
-                )
-        elif log_type == "set":
-            if borg.map.convert_id_to_key(self._my_self) in borg.map.created_objs:
-                index = borg.map.created_objs.index(
-                    borg.map.convert_id_to_key(self._my_self)
-                )
-                temp += f"{self._my_self.__class__.__name__.lower()}_{index}.{self._get_id} = "
-            args = args[1:]
-            for var in args:
-                if borg.map.convert_id_to_key(var) in borg.map.argument_objs:
-                    index = borg.map.argument_objs.index(
-                        borg.map.convert_id_to_key(var)
-                    )
-                    temp += f"{Store().var_ident}{index}"
-                elif borg.map.convert_id_to_key(var) in borg.map.returned_objs:
-                    index = borg.map.returned_objs.index(
-                        borg.map.convert_id_to_key(var)
-                    )
-                    temp += f"{Store().var_ident}{index}"
-                elif borg.map.convert_id_to_key(var) in borg.map.created_objs:
-                    index = borg.map.created_objs.index(borg.map.convert_id_to_key(var))
-                    temp += f"{self._my_self.__class__.__name__.lower()}_{index}"
-                else:
-                    if isinstance(var, str):
-                        var = '"' + var + '"'
-                    temp += f"{var}"
-        else:
-            print(f"{log_type} is not implemented yet. Sorry")
-        temp += "\n"
-        return temp
+        returned_index = borg.map.returned_index
+        returned_parts = []
+        for var in returns:
+            key = borg.map.convert_id_to_key(var)
+            if key in returned_index:
+                returned_parts.append(f"{self._store.var_ident}{returned_index[key]}")
+        if len(returns) > 0:
+            parts.append(", ".join(returned_parts))
+            parts.append(" = ")
+        created_index = borg.map.created_index
+        my_key = self._get_my_self_key()
+        if my_key in created_index:
+            parts.append(f"{self._my_self_cls_lower}_{created_index[my_key]}.{self._get_id}")
+        parts.append("\n")
+        return "".join(parts)
+
+    def _make_set_entry(self, *args) -> str:
+        parts = []
+        argument_index = borg.map.argument_index
+        returned_index = borg.map.returned_index
+        created_index = borg.map.created_index
+        my_key = self._get_my_self_key()
+        cls_name = self._my_self_cls_lower
+        if my_key in created_index:
+            parts.append(f"{cls_name}_{created_index[my_key]}.{self._get_id} = ")
+        for var in args[1:]:
+            key = borg.map.convert_id_to_key(var)
+            if key in argument_index:
+                parts.append(f"{self._store.var_ident}{argument_index[key]}")
+            elif key in returned_index:
+                parts.append(f"{self._store.var_ident}{returned_index[key]}")
+            elif key in created_index:
+                parts.append(f"{cls_name}_{created_index[key]}")
+            else:
+                if isinstance(var, str):
+                    var = '"' + var + '"'
+                parts.append(f"{var}")
+        parts.append("\n")
+        return "".join(parts)
+
+
+def _wrap(wrapper: Callable, wrapped: Callable) -> Callable:
+    # The subset of `functools.wraps` the script log needs, without copying the wrapped `__dict__`.
+    wrapper.__module__ = wrapped.__module__
+    wrapper.__name__ = wrapped.__name__
+    wrapper.__qualname__ = wrapped.__qualname__
+    wrapper.__doc__ = wrapped.__doc__
+    wrapper.__wrapped__ = wrapped
+    return wrapper
+
+
+def _toggle_logged_properties(enabled: bool):
+    for klass in list(_logged_classes):
+        logged = klass.__dict__.get("_logged_properties", {})
+        for name, prop in list(logged.items()):
+            current = klass.__dict__.get(name)
+            if current is None or (current is not prop and current is not prop._plain):
+                # Replaced by something else since it was installed, which has to stay.
+                del logged[name]
+                continue
+            setattr(klass, name, prop if enabled else prop._as_property())
+
+
+borg.script.add_toggle_hook(_toggle_logged_properties)
 
 
 class PropertyHugger(PatcherFactory):
@@ -169,104 +207,110 @@ class PropertyHugger(PatcherFactory):
         else:
             self.prop_name = prop_name
             self.property = klass.__dict__.get(prop_name)
-        self.__patch_ref = {
-            "fget": {"old": self.property.fget, "patcher": self.patch_get},
-            "fset": {"old": self.property.fset, "patcher": self.patch_set},
-            "fdel": {"old": self.property.fdel, "patcher": self.patch_del},
-        }
+        # Names used by the debug output and the script entries
+        self._qualname = f"{klass.__name__}.{self.prop_name}"
+        self._klass_lower = klass.__name__.lower()
+        # (accessor name, original accessor, patcher) for each accessor the property actually has
+        self._patch_specs: Tuple[Tuple[str, Callable, Callable], ...] = tuple(
+            (key, getattr(self.property, key), patcher)
+            for key, patcher in (
+                ("fget", self.patch_get),
+                ("fset", self.patch_set),
+                ("fdel", self.patch_del),
+            )
+            if getattr(self.property, key) is not None
+        )
 
     def patch(self):
+        if borg.debug:
+            print(f"Patching property {self._qualname}")
         option = {}
-        for key, item in self.__patch_ref.items():
-            func = getattr(self.property, key)
-            if func is not None:
-                if borg.debug:
-                    print(f"Patching property {self.klass.__name__}.{self.prop_name}")
-                patch_function: Callable = item.get("patcher")
-                new_func = patch_function(func)
-                option[key] = new_func
+        for key, func, patch_function in self._patch_specs:
+            option[key] = patch_function(func)
         setattr(self.klass, self.prop_name, property(**option))
 
     def restore(self):
         if borg.debug:
-            print(f"Restoring property {self.klass.__name__}.{self.prop_name}")
+            print(f"Restoring property {self._qualname}")
         setattr(self.klass, self.prop_name, self.property)
 
     def patch_get(self, func: Callable) -> Callable:
-        @wraps(func)
+        qualname = self._qualname
+
         def inner(*args, **kwargs):
             if borg.debug:
-                print(
-                    f"{self.klass.__name__}.{self.prop_name} has been called with {args[1:]}, {kwargs}"
-                )
+                print(f"{qualname} has been called with {args[1:]}, {kwargs}")
             res = func(*args, **kwargs)
             self._append_args(*args, **kwargs)
             self._append_result(res)
             self._append_log(self.makeEntry("get", res, *args, **kwargs))
             return res
 
-        return inner
+        return _wrap(inner, func)
 
     def patch_set(self, func: Callable) -> Callable:
-        @wraps(func)
+        qualname = self._qualname
+
         def inner(*args, **kwargs):
             if borg.debug:
-                print(
-                    f"{self.klass.__name__}.{self.prop_name} has been set with {args[1:]}, {kwargs}"
-                )
+                print(f"{qualname} has been set with {args[1:]}, {kwargs}")
             self._append_args(*args, **kwargs)
             self._append_log(self.makeEntry("set", None, *args, **kwargs))
             return func(*args, **kwargs)
 
-        return inner
+        return _wrap(inner, func)
 
     def patch_del(self, func: Callable) -> Callable:
-        @wraps(func)
+        qualname = self._qualname
+
         def inner(*args, **kwargs):
             if borg.debug:
-                print(f"{self.klass.__name__}.{self.prop_name} has been deleted.")
+                print(f"{qualname} has been deleted.")
             self._append_log(self.makeEntry("del", None, *args, **kwargs))
             return func(*args, **kwargs)
 
-        return inner
+        return _wrap(inner, func)
 
     def makeEntry(self, log_type, returns, *args, **kwargs) -> str:
-        temp = ""
+        parts = []
+        cls_name = self._klass_lower
+        var_ident = self._store.var_ident
+        create_index = self._store.create_index
+        rets_index = self._store.unique_rets_index
         if returns is None:
             returns = []
-        if not isinstance(returns, list):
+        if type(returns) is not list:
             returns = [returns]
         if log_type == "get":
+            returned_parts = []
             for var in returns:
-                if self._in_list("return_list", var):
-                    index = self._get_position("return_list", var)
-                    temp += f"{self._store.var_ident}{index}, "
+                index = rets_index.get(id(var))
+                if index is not None:
+                    returned_parts.append(f"{var_ident}{index}")
             if len(returns) > 0:
-                temp = temp[:-2]
-                temp += " = "
-            if self._in_list("create_list", args[0]):
-                index = self._get_position("create_list", args[0])
-                temp += f"{self.klass.__name__.lower()}_{index}.{self.prop_name}"
+                parts.append(", ".join(returned_parts))
+                parts.append(" = ")
+            index = create_index.get(id(args[0]))
+            if index is not None:
+                parts.append(f"{cls_name}_{index}.{self.prop_name}")
         elif log_type == "set":
-            if self._in_list("create_list", args[0]):
-                index = self._get_position("create_list", args[0])
-                temp += f"{self.klass.__name__.lower()}_{index}.{self.prop_name} = "
-            args = args[1:]
-            for var in args:
-                if self._in_list("input_list", var):
-                    index = self._get_position("input_list", var)
-                    temp += f"{self._store.var_ident}{index}"
-                elif self._in_list("return_list", var):
-                    index = self._get_position("return_list", var)
-                    temp += f"{self._store.var_ident}{index}"
-                elif self._in_list("create_list", var):
-                    index = self._get_position("create_list", var)
-                    temp += f"{self.klass.__name__.lower()}_{index}"
+            args_index = self._store.unique_args_index
+            index = create_index.get(id(args[0]))
+            if index is not None:
+                parts.append(f"{cls_name}_{index}.{self.prop_name} = ")
+            for var in args[1:]:
+                var_id = id(var)
+                if var_id in args_index:
+                    parts.append(f"{var_ident}{args_index[var_id]}")
+                elif var_id in rets_index:
+                    parts.append(f"{var_ident}{rets_index[var_id]}")
+                elif var_id in create_index:
+                    parts.append(f"{cls_name}_{create_index[var_id]}")
                 else:
                     if isinstance(var, str):
                         var = '"' + var + '"'
-                    temp += f"{var}"
+                    parts.append(f"{var}")
         else:
             print(f"{log_type} is not implemented yet. Sorry")
-        temp += "\n"
-        return temp
+        parts.append("\n")
+        return "".join(parts)
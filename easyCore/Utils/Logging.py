@@ -6,6 +6,7 @@ __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
 import logging
+from typing import Dict
 
 
 class Logger:
@@ -13,6 +14,7 @@ class Logger:
         self.logger = logging.getLogger(__name__)
         self.level = log_level
         self.logger.setLevel(self.level)
+        self._logger_cache: Dict[str, logging.Logger] = {}
 
     def getLogger(
         self, logger_name, color: str = "32", defaults: bool = True
@@ -24,8 +26,13 @@ class Logger:
         :param defaults: Do you want to associate any current file loggers with this logger
         :return: A logger
         """
-        logger = logging.getLogger(logger_name)
-        logger.setLevel(self.level)
+        logger = self._logger_cache.get(logger_name)
+        if logger is None:
+            logger = logging.getLogger(logger_name)
+            self._logger_cache[logger_name] = logger
+        # `setLevel` clears the level cache of every logger, so only call it when something changes.
+        if logger.level != self.level:
+            logger.setLevel(self.level)
         # self.applyLevel(logger)
         # for handler_type in self._handlers:
         #     for handler in self._handlers[handler_type]:
@@ -12,6 +12,7 @@ from collections import deque
 from typing import Any
 from typing import Callable
 from typing import Iterable
+from typing import Iterator
 from typing import NoReturn
 from typing import TypeVar
 from typing import Union
@@ -26,6 +27,8 @@ class UndoCommand(metaclass=abc.ABCMeta):
     The Command interface pattern
     """
 
+    __slots__ = ('_obj', '_text')
+
     def __init__(self, obj) -> None:
         self._obj = obj
         self._text = None
@@ -55,13 +58,16 @@ T_ = TypeVar('T_', bound=UndoCommand)
 
 
 def dict_stack_deco(func: Callable) -> Callable:
+    # Closure cell rather than a global lookup per call. `stack` is still looked up on each push as it can be replaced.
+    _borg = borg
+
     def inner(obj, *args, **kwargs):
         # Only do the work to a NotarizedDict.
-        if hasattr(obj, '_stack_enabled') and obj._stack_enabled:
+        if getattr(obj, '_stack_enabled', False):
             if not kwargs:
-                borg.stack.push(DictStack(obj, *args))
+                _borg.stack.push(DictStack(obj, *args))
             else:
-                borg.stack.push(DictStackReCreate(obj, **kwargs))
+                _borg.stack.push(DictStackReCreate(obj, **kwargs))
         else:
             func(obj, *args, **kwargs)
 
@@ -105,39 +111,59 @@ class CommandHolder:
     """
 
     def __init__(self, text: str = None):
-        self._commands = deque()
+        # Oldest first, so the most recent command is at the end
+        self._commands = []
         self._text = text
-        self.__index = 0
 
     def append(self, command: T_):
-        self._commands.appendleft(command)
+        self._commands.append(command)
 
     def pop(self):
-        return self._commands.popleft()
+        return self._commands.pop()
+
+    def __iter__(self) -> Iterator[T_]:
+        # Most recent first, i.e. undo order
+        return reversed(self._commands)
 
-    def __iter__(self) -> T_:
-        while self.__index < len(self):
-            index = self.__index
-            self.__index += 1
-            yield self._commands[index]
-        self.__index = 0
+    def __reversed__(self) -> Iterator[T_]:
+        return iter(self._commands)
 
     def __len__(self) -> int:
         return len(self._commands)
 
+    def undo(self) -> NoReturn:
+        """
+        Undo the held commands, most recent first
+        """
+        for command in self:
+            try:
+                command.undo()
+            except Exception as e:
+                print(e)
+
+    def redo(self) -> NoReturn:
+        """
+        Redo the held commands in the order they were added
+        """
+        for command in reversed(self):
+            try:
+                command.redo()
+            except Exception as e:
+                print(e)
+
     @property
     def is_macro(self) -> bool:
         return len(self) > 1
 
     @property
     def current(self) -> T_:
-        return self._commands[0]
+        return self._commands[-1]
 
     @property
     def text(self) -> str:
         text = ''
         if self._commands:
-            text = self._commands[-1].text
+            text = self._commands[0].text
         if self._text is not None:
             text = self._text
         return text
@@ -153,6 +179,7 @@ class UndoStack:
     """
 
     def __init__(self, max_history: Union[int, type(None)] = None):
+        # The most recent entry is at the right of both deques, the oldest falls off the left when full.
         self._history = deque(maxlen=max_history)
         self._future = deque(maxlen=max_history)
         self._macro_running = False
@@ -192,16 +219,16 @@ class UndoStack:
             return
         # If there's a macro add the command to the command holder
         if self._macro_running:
-            self.history[0].append(command)
+            self.history[-1].append(command)
         else:
             # Else create the command holder and add it to the stack
             com = CommandHolder()
             com.append(command)
-            self.history.appendleft(com)
+            self.history.append(com)
         # Actually do the command
         command.redo()
         # Reset the future
-        self._future = deque(maxlen=self._max_history)
+        self._future.clear()
 
     def pop(self) -> T_:
         """
@@ -212,18 +239,18 @@ class UndoStack:
         :return: None
         :rtype: None
         """
-        pop_it = self._history.popleft()
+        pop_it = self._history.pop()
         popped = pop_it.pop()
         if len(pop_it) > 0:
-            self.history.appendleft(pop_it)
+            self.history.append(pop_it)
         return popped
 
     def clear(self) -> NoReturn:
         """
         Remove any commands on the stack and reset the state
         """
-        self._history = deque(maxlen=self._max_history)
-        self._future = deque(maxlen=self._max_history)
+        self._history.clear()
+        self._future.clear()
         self._macro_running = False
 
     def undo(self) -> NoReturn:
@@ -232,18 +259,15 @@ class UndoStack:
         """
         if self.canUndo():
             # Move the command from the past to the future
-            this_command_stack = self._history.popleft()
-            self._future.appendleft(this_command_stack)
+            this_command_stack = self._history.pop()
+            self._future.append(this_command_stack)
 
             # Execute all undo commands
-            for command in this_command_stack:
-                try:
-                    self._command_running = True
-                    command.undo()
-                except Exception as e:
-                    print(e)
-                finally:
-                    self._command_running = False
+            self._command_running = True
+            try:
+                this_command_stack.undo()
+            finally:
+                self._command_running = False
 
     def redo(self) -> NoReturn:
         """
@@ -251,19 +275,13 @@ class UndoStack:
         """
         if self.canRedo():
             # Move from the future to the past
-            this_command_stack = self._future.popleft()
-            self._history.appendleft(this_command_stack)
-            # Need to go from right to left
-            this_command_stack = list(this_command_stack)
-            this_command_stack.reverse()
-            for command in this_command_stack:
-                try:
-                    self._command_running = True
-                    command.redo()
-                except Exception as e:
-                    print(e)
-                finally:
-                    self._command_running = False
+            this_command_stack = self._future.pop()
+            self._history.append(this_command_stack)
+            self._command_running = True
+            try:
+                this_command_stack.redo()
+            finally:
+                self._command_running = False
 
     def beginMacro(self, text: str) -> NoReturn:
         """
@@ -272,7 +290,7 @@ class UndoStack:
         if self._macro_running:
             raise AssertionError('Cannot start a macro when one is already running')
         com = CommandHolder(text)
-        self.history.appendleft(com)
+        self.history.append(com)
         self._macro_running = True
 
     def endMacro(self) -> NoReturn:
@@ -301,7 +319,7 @@ class UndoStack:
         """
         text = ''
         if self.canRedo():
-            text = self.future[0].text
+            text = self.future[-1].text
         return text
 
     def undoText(self) -> str:
@@ -310,7 +328,7 @@ class UndoStack:
         """
         text = ''
         if self.canUndo():
-            text = self.history[0].text
+            text = self.history[-1].text
         return text
 
 
@@ -319,6 +337,8 @@ class PropertyStack(UndoCommand):
     Stack operator for when a property setter is wrapped.
     """
 
+    __slots__ = ('_parent', '_parent_text', '_old_value', '_new_value', '_set_func')
+
     def __init__(self, parent, func: Callable, old_value: Any, new_value: Any, text: str = None):
         # self.setText("Setting {} to {}".format(func.__name__, new_value))
         super().__init__(self)
@@ -326,9 +346,20 @@ class PropertyStack(UndoCommand):
         self._old_value = old_value
         self._new_value = new_value
         self._set_func = func
-        self.text = f'{parent} value changed from {old_value} to {new_value}'
-        if text is not None:
-            self.text = text
+        # The parent's repr shows its current value, so it has to be taken before the change is applied.
+        self._parent_text = str(parent) if text is None else None
+        self.text = text
+
+    @property
+    def text(self) -> str:
+        # The rest of the default description is only built when someone asks for it.
+        if self._text is None:
+            self._text = f'{self._parent_text} value changed from {self._old_value} to {self._new_value}'
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> NoReturn:
+        self._text = text
 
     def undo(self) -> NoReturn:
         self._set_func(self._parent, self._old_value)
@@ -338,6 +369,8 @@ class PropertyStack(UndoCommand):
 
 
 class FunctionStack(UndoCommand):
+    __slots__ = ('_parent', '_old_fn', '_new_fn')
+
     def __init__(self, parent, set_func: Callable, unset_func: Callable, text: str = None):
         super().__init__(self)
         self._parent = parent
@@ -355,6 +388,8 @@ class FunctionStack(UndoCommand):
 
 
 class DictStack(UndoCommand):
+    __slots__ = ('_parent', '_deletion', '_creation', '_key', '_index', '_old_value', '_new_value')
+
     def __init__(self, in_dict: NotarizedDict, *args):
         super().__init__(self)
         self._parent = in_dict
@@ -371,7 +406,10 @@ class DictStack(UndoCommand):
         if len(args) == 1:
             # We are deleting
             self._deletion = True
-            self._index = list(self._parent.keys()).index(args[0])
+            for index, key in enumerate(self._parent.data):
+                if key == args[0]:
+                    self._index = index
+                    break
             self._old_value = self._parent[args[0]]
             self._key = args[0]
             self.text = f'Deleting {args[0]} from {self._parent}'
@@ -399,11 +437,9 @@ class DictStack(UndoCommand):
                 self._parent.data.__setitem__(self._key, self._old_value)
             else:
                 # This deals with placing an item in a place
-                keys = list(self._parent.keys())
-                values = list(self._parent.values())
-                keys.insert(self._index, self._key)
-                values.insert(self._index, self._old_value)
-                self._parent.reorder(**{k: v for k, v in zip(keys, values)})
+                items = list(self._parent.data.items())
+                items.insert(self._index, (self._key, self._old_value))
+                self._parent.data = dict(items)
 
     def redo(self) -> NoReturn:
         if self._deletion:
@@ -414,6 +450,8 @@ class DictStack(UndoCommand):
 
 
 class DictStackReCreate(UndoCommand):
+    __slots__ = ('_parent', '_old_value', '_new_value')
+
     def __init__(self, in_dict: NotarizedDict, **kwargs):
         super().__init__(self)
         self._parent = in_dict
@@ -428,6 +466,21 @@ class DictStackReCreate(UndoCommand):
         self._parent.data = self._new_value
 
 
+# Builtin scalars compare to a plain bool, so they never need the element-wise numpy path.
+_SCALAR_TYPES = frozenset((bool, int, float, complex, str))
+
+
+def _values_equal(old_value: Any, new_value: Any) -> bool:
+    """
+    Does setting `new_value` over `old_value` change anything? Iterables are compared element-wise.
+    """
+    if type(old_value) is type(new_value) and type(old_value) in _SCALAR_TYPES:
+        return old_value == new_value
+    if isinstance(old_value, Iterable) or isinstance(new_value, Iterable):
+        return np.all(old_value == new_value)
+    return old_value == new_value
+
+
 def property_stack_deco(arg: Union[str, Callable], begin_macro: bool = False) -> Callable:
     """
     Decorate a `property` setter with undo/redo functionality
@@ -456,21 +509,24 @@ def property_stack_deco(arg: Union[str, Callable], begin_macro: bool = False) ->
 
     """
 
-    def make_wrapper(func: Callable, name: str, **kwargs) -> Callable:
-        def wrapper(obj, *args) -> NoReturn:
+    _borg = borg
+
+    def make_wrapper(func: Callable, name: str, text: str = None) -> Callable:
+        # Everything but the values is fixed here, so the setter only does the comparison and the push.
+        def wrapper(obj, new_value) -> NoReturn:
             old_value = getattr(obj, name)
-            new_value = args[0]
-            if issubclass(type(old_value), Iterable) or issubclass(type(new_value), Iterable):
-                ret = np.all(old_value == new_value)
-            else:
-                ret = old_value == new_value
-            if ret:
+            if _values_equal(old_value, new_value):
                 return
 
-            if borg.debug:
+            if _borg.debug:
                 print(f"I'm {obj} and have been set from {old_value} to {new_value}!")
 
-            borg.stack.push(PropertyStack(obj, func, old_value, new_value, **kwargs))
+            stack = _borg.stack
+            if not stack.enabled:
+                # Nothing will be recorded, so skip building the command `push` would just redo.
+                func(obj, new_value)
+                return
+            stack.push(PropertyStack(obj, func, old_value, new_value, text))
 
         return functools.update_wrapper(wrapper, func)
 
@@ -8,6 +8,7 @@ __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
 from typing import TYPE_CHECKING
+from typing import Dict
 from typing import List
 from typing import Tuple
 
@@ -15,58 +16,83 @@ from easyCore import borg
 from easyCore.Utils.Hugger.Property import LoggedProperty
 
 if TYPE_CHECKING:
+    from uuid import UUID
+
     from easyCore.Utils.typing import BV
     from easyCore.Utils.typing import B
 
 
-def addLoggedProp(inst: BV, name: str, *args, **kwargs) -> None:
+def _ensure_perinstance(inst: BV, module: str) -> type:
+    """
+    Get the class unique to `inst`, creating it on first use, so that properties can be changed on it without
+    affecting any other instance.
+    """
     cls = type(inst)
+    # Checked on the class itself, a subclass of a per-instance class is not one.
+    if "__perinstance" in cls.__dict__:
+        return cls
     annotations = getattr(cls, "__annotations__", False)
-    if not hasattr(cls, "__perinstance"):
-        cls = type(cls.__name__, (cls,), {"__module__": inst.__module__})
-        cls.__perinstance = True
-        if annotations:
-            cls.__annotations__ = annotations
-        inst.__old_class__ = inst.__class__
-        inst.__class__ = cls
-    setattr(cls, name, LoggedProperty(*args, **kwargs))
+    new_cls = type(cls.__name__, (cls,), {"__module__": module, "__perinstance": True})
+    if annotations:
+        new_cls.__annotations__ = annotations
+    inst.__old_class__ = cls
+    inst.__class__ = new_cls
+    return new_cls
 
 
-def addProp(inst: BV, name: str, *args, **kwargs) -> None:
-    cls = type(inst)
-    annotations = getattr(cls, "__annotations__", False)
-    if not hasattr(cls, "__perinstance"):
-        cls = type(cls.__name__, (cls,), {"__module__": __name__})
-        cls.__perinstance = True
-        if annotations:
-            cls.__annotations__ = annotations
-        inst.__old_class__ = inst.__class__
-        inst.__class__ = cls
+def addLoggedProp(inst: BV, name: str, *args, **kwargs) -> None:
+    cls = _ensure_perinstance(inst, inst.__module__)
+    LoggedProperty(*args, **kwargs).install(cls, name)
+
 
+def addProp(inst: BV, name: str, *args, **kwargs) -> None:
+    cls = _ensure_perinstance(inst, __name__)
+    # A plain property replaces any logged one, which must not come back when scripting is toggled.
+    cls.__dict__.get("_logged_properties", {}).pop(name, None)
     setattr(cls, name, property(*args, **kwargs))
 
 
 def removeProp(inst: BV, name: str) -> None:
     cls = type(inst)
-    if not hasattr(cls, "__perinstance"):
-        cls = type(cls.__name__, (cls,), {"__module__": __name__})
-        cls.__perinstance = True
-        inst.__old_class__ = inst.__class__
-        inst.__class__ = cls
+    if "__perinstance" not in cls.__dict__:
+        # Nothing has been added to this instance, so there is nothing of its own to remove.
+        raise AttributeError(name)
+    cls.__dict__.get("_logged_properties", {}).pop(name, None)
     delattr(cls, name)
 
 
+# (model key, parameter key) -> route between them, valid for the graph generation it was found in.
+_route_cache: Dict[Tuple[int, int], List[int]] = {}
+_route_cache_generation = -1
+
+
+def _cached_route(elem: UUID, model_id: UUID) -> List[int]:
+    global _route_cache_generation
+    generation = borg.map.generation
+    if generation != _route_cache_generation:
+        _route_cache.clear()
+        _route_cache_generation = generation
+    key = (model_id.int, elem.int)
+    route = _route_cache.get(key)
+    if route is None:
+        route = borg.map.reverse_route(elem, model_id)
+        _route_cache[key] = route
+    return route
+
+
 def generatePath(model_obj: B, skip_first: bool = False) -> Tuple[List[int], List[str]]:
     pars = model_obj.get_parameters()
     start_idx = 0 + int(skip_first)
     ids = []
     names = []
+    get_items_by_keys = borg.map.get_items_by_keys
     model_id = borg.map.convert_id(model_obj)
-    for par in pars:
-        elem = borg.map.convert_id(par)
-        route = borg.map.reverse_route(elem, model_id)
-        objs = [getattr(borg.map.get_item_by_key(r), "name") for r in route]
-        objs.reverse()
-        names.append(".".join(objs[start_idx:]))
+    elems = borg.map.convert_ids(pars)
+    for elem in elems:
+        # Only the routes are cached, names are looked up each time as objects can be renamed.
+        route = _cached_route(elem, model_id)
+        # Routes run from the parameter up to the model, names are written the other way round.
+        items = get_items_by_keys(route[i] for i in range(len(route) - 1 - start_idx, -1, -1))
+        names.append(".".join(item.name for item in items))
         ids.append(elem.int)
     return ids, names
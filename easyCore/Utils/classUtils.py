@@ -21,12 +21,15 @@ def singleton(cls):
                 pass
     """
 
-    instances = {}
-
-    def get_instance():
-        if cls not in instances:
-            instances[cls] = cls()
-        return instances[cls]
+    instance = None
+
+    @wraps(cls, updated=())
+    def get_instance(*args, **kwargs):
+        # A closure cell, so an existing instance costs a single `is None` check
+        nonlocal instance
+        if instance is None:
+            instance = cls(*args, **kwargs)
+        return instance
 
     return get_instance
 
@@ -5,43 +5,39 @@
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-import collections.abc
 import functools
+import logging
 import warnings
-from time import time
+from time import perf_counter_ns
 
 from easyCore import borg
 
 
-class memoized:
+def memoized(func):
     """
     Decorator. Caches a function's return value each time it is called.
     If called later with the same arguments, the cached value is returned
-    (not reevaluated).
+    (not reevaluated). The cache can be inspected and reset with `cache_info`
+    and `cache_clear`.
     """
+    cached = functools.lru_cache(maxsize=None)(func)
 
-    def __init__(self, func):
-        self.func = func
-        self.cache = {}
-
-    def __call__(self, *args):
-        if not isinstance(args, collections.abc.Hashable):
-            # uncacheable. a list, for instance.
-            # better to not cache than blow up.
-            return self.func(*args)
-        if args in self.cache:
-            return self.cache[args]
-        value = self.func(*args)
-        self.cache[args] = value
-        return value
-
-    def __repr__(self) -> str:
-        """Return the function's docstring."""
-        return self.func.__doc__
+    @functools.wraps(func)
+    def wrapper(*args):
+        try:
+            return cached(*args)
+        except TypeError:
+            try:
+                hash(args)
+            except TypeError:
+                # uncacheable. a list, for instance.
+                # better to not cache than blow up.
+                return func(*args)
+            raise
 
-    def __get__(self, obj, objtype):
-        """Support instance methods."""
-        return functools.partial(self.__call__, obj)
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
 
 
 def counted(func):
@@ -71,14 +67,14 @@ def time_it(func):
 
     @functools.wraps(func)
     def _time_it(*args, **kwargs):
-        start = int(round(time() * 1000))
+        start = perf_counter_ns()
         try:
             return func(*args, **kwargs)
         finally:
-            end_ = int(round(time() * 1000)) - start
-            time_logger.debug(
-                f"\033[1;34;49mExecution time: {end_ if end_ > 0 else 0} ms\033[0m"
-            )
+            # The clock is monotonic, so the elapsed time can't go negative.
+            if time_logger.isEnabledFor(logging.DEBUG):
+                end_ = (perf_counter_ns() - start) // 1_000_000
+                time_logger.debug(f"\033[1;34;49mExecution time: {end_} ms\033[0m")
 
     return _time_it
 
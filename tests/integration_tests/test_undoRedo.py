@@ -14,6 +14,7 @@ from easyCore.Objects.Groups import BaseCollection
 from easyCore.Objects.ObjectClasses import BaseObj
 from easyCore.Objects.Variable import Descriptor
 from easyCore.Objects.Variable import Parameter
+from easyCore.Utils.UndoRedo import PropertyStack
 
 
 def createSingleObjs(idx):
@@ -410,3 +411,109 @@ def test_fittingUndoRedo(fit_engine):
 #     assert float(p1) == result_value
 #     assert p1.error == result_error
 #     assert str(p1.unit) == u_str
+
+
+def test_UndoStack_clear_keeps_max_history():
+    from easyCore.Utils.UndoRedo import UndoStack
+
+    stack = UndoStack(max_history=3)
+    stack.enabled = True
+    p = Parameter("p", 1)
+    for value in range(5):
+        stack.push(PropertyStack(p, lambda obj, v: None, value, value + 1))
+    assert len(stack.history) == 3
+    stack.undo()
+    assert len(stack.future) == 1
+    stack.push(PropertyStack(p, lambda obj, v: None, 5, 6))
+    assert len(stack.future) == 0
+    stack.clear()
+    assert len(stack.history) == 0
+    assert stack.history.maxlen == 3
+    assert stack.future.maxlen == 3
+
+
+def test_NotarizedDict_undo_delete_keeps_order():
+    from easyCore import borg
+    from easyCore.Utils.UndoRedo import NotarizedDict
+
+    d = NotarizedDict(a=1, b=2, c=3)
+    d._stack_enabled = True
+    borg.stack.enabled = True
+    try:
+        del d["b"]
+        assert list(d.items()) == [("a", 1), ("c", 3)]
+        borg.stack.undo()
+        assert list(d.items()) == [("a", 1), ("b", 2), ("c", 3)]
+        borg.stack.redo()
+        assert list(d.items()) == [("a", 1), ("c", 3)]
+    finally:
+        borg.stack.enabled = False
+        borg.stack.clear()
+
+
+def test_CommandHolder_order():
+    from easyCore.Utils.UndoRedo import CommandHolder
+
+    p = Parameter("p", 1)
+    first = PropertyStack(p, lambda obj, v: None, 1, 2, text="first")
+    second = PropertyStack(p, lambda obj, v: None, 2, 3, text="second")
+    holder = CommandHolder()
+    holder.append(first)
+    holder.append(second)
+    assert holder.is_macro
+    assert list(holder) == [second, first]
+    assert list(reversed(holder)) == [first, second]
+    assert holder.current is second
+    assert holder.text == "first"
+    assert holder.pop() is second
+    assert list(holder) == [first]
+
+
+def test_UndoStack_drops_oldest_history():
+    from easyCore.Utils.UndoRedo import UndoStack
+
+    stack = UndoStack(max_history=2)
+    stack.enabled = True
+    p = Parameter("p", 1)
+    for value in range(3):
+        stack.push(PropertyStack(p, lambda obj, v: None, value, value + 1, text=str(value)))
+    assert stack.undoText() == "2"
+    stack.undo()
+    assert stack.undoText() == "1"
+    assert stack.redoText() == "2"
+    stack.undo()
+    assert not stack.canUndo()
+    stack.redo()
+    assert stack.undoText() == "1"
+    assert stack.redoText() == "2"
+
+
+def test_CommandHolder_undo_redo_order():
+    from easyCore.Utils.UndoRedo import CommandHolder
+
+    calls = []
+    p = Parameter("p", 1)
+    holder = CommandHolder("macro")
+    for old, new in [(1, 2), (2, 3)]:
+        holder.append(PropertyStack(p, lambda obj, v: calls.append(v), old, new))
+    holder.undo()
+    assert calls == [2, 1]
+    calls.clear()
+    holder.redo()
+    assert calls == [2, 3]
+
+
+def test_PropertyStack_text_describes_state_before_change():
+    from easyCore import borg
+
+    p = Parameter("p", 1.0)
+    borg.stack.enabled = True
+    try:
+        before = str(p)
+        p.value = 2.0
+        p.value = 3.0
+        borg.stack.undo()
+        assert borg.stack.undoText().startswith(f"{before} value changed from ")
+    finally:
+        borg.stack.enabled = False
+        borg.stack.clear()
@@ -476,3 +476,116 @@ def test_BaseCreation():
     assert b.b.a.raw_value == 3.0
     b.b.a = 4.0
     assert b.b.a.raw_value == 4.0
+
+
+def test_BaseObj_logged_props_follow_script_state():
+    from easyCore import borg
+    from easyCore.Utils.Hugger.Property import LoggedProperty
+
+    obj = BaseObj("test", p=Parameter("p", 1.0))
+    assert isinstance(type(obj).__dict__["p"], LoggedProperty)
+    borg.script.enabled = False
+    try:
+        assert type(type(obj).__dict__["p"]) is property
+        assert obj.p.raw_value == 1.0
+        other = BaseObj("other", q=Parameter("q", 2.0))
+        assert type(type(other).__dict__["q"]) is property
+    finally:
+        borg.script.enabled = True
+    assert isinstance(type(obj).__dict__["p"], LoggedProperty)
+    assert isinstance(type(other).__dict__["q"], LoggedProperty)
+    assert other.q.raw_value == 2.0
+
+
+def test_BaseObj_setattr_clears_internal_access():
+    from easyCore.Utils.Hugger.Property import internal_access
+
+    class A(BaseObj):
+        a: ClassVar[Parameter]
+
+        def __init__(self, a: Parameter):
+            super(A, self).__init__("a", a=a)
+
+        @property
+        def read_only(self):
+            return 1
+
+    obj = A(Parameter("a", 1.0))
+    obj.a = Parameter("a", 2.0)
+    assert not internal_access.get()
+    with pytest.raises(AttributeError):
+        obj.read_only = 2
+    assert not internal_access.get()
+    assert obj.a.raw_value == 2.0
+
+
+def test_BaseObj_generatePath_follows_changes():
+    from easyCore.Utils.classTools import generatePath
+
+    class A(BaseObj):
+        inner: ClassVar[BaseObj]
+
+        def __init__(self, inner: BaseObj, q: Parameter):
+            super(A, self).__init__("outer", inner=inner, q=q)
+
+    obj = A(BaseObj("inner", p=Parameter("p", 1.0)), Parameter("q", 2.0))
+    assert generatePath(obj)[1] == ["outer.inner.p", "outer.q"]
+    assert generatePath(obj, skip_first=True)[1] == ["inner.p", "q"]
+    obj.inner.p.name = "pp"
+    assert generatePath(obj)[1] == ["outer.inner.pp", "outer.q"]
+    obj.inner = BaseObj("inner2", r=Parameter("r", 3.0))
+    assert generatePath(obj)[1] == ["outer.inner2.r", "outer.q"]
+
+
+def test_BaseObj_setattr_logs_reads_from_callbacks():
+    from easyCore import borg
+
+    other = BaseObj("other", q=Parameter("q", 2.0))
+    obj = BaseObj("obj", p=Parameter("p", 1.0))
+    borg.script.reset_history()
+    obj.p._callback = property(fset=lambda value: other.q)
+    try:
+        obj.p = 5.0
+        history = borg.script.history()
+        assert any(entry.endswith(".q\n") for entry in history)
+    finally:
+        borg.script.reset_history()
+
+
+def test_BaseObj_addProp_survives_script_toggle():
+    from easyCore import borg
+    from easyCore.Utils.classTools import addProp
+
+    obj = BaseObj("obj", p=Parameter("p", 1.0))
+    addProp(obj, "p", lambda self: "plain")
+    enabled = borg.script.enabled
+    try:
+        borg.script.enabled = not enabled
+        borg.script.enabled = enabled
+        assert obj.p == "plain"
+    finally:
+        borg.script.enabled = enabled
+
+
+def test_BaseObj_repeated_logged_gets_reuse_graph_index(monkeypatch):
+    from easyCore import borg
+
+    obj = BaseObj("obj", p=Parameter("p", 1.0))
+    borg.map.change_type(obj, "created")
+    scans = []
+    nested_get = borg.map._nested_get
+
+    def counting_nested_get(obj_type):
+        scans.append(obj_type)
+        return nested_get(obj_type)
+
+    monkeypatch.setattr(borg.map, "_nested_get", counting_nested_get)
+    try:
+        obj.p
+        scans.clear()
+        for _ in range(10):
+            obj.p
+        assert scans == []
+        assert borg.script.history()[-1].endswith(".p\n")
+    finally:
+        borg.script.reset_history()
@@ -5,3 +5,115 @@ __version__ = "0.1.0"
 #  SPDX-License-Identifier: BSD-3-Clause
 #  © 2021-2023 Contributors to the easyCore project <https://github.com/easyScience/easyCore
 
+
+import pytest
+
+from easyCore.Objects.Graph import Graph
+from easyCore.Objects.Graph import _EntryList
+
+
+class _Vertex:
+    pass
+
+
+def test_nested_index_matches_list_positions():
+    graph = Graph()
+    vertices = [_Vertex() for _ in range(4)]
+    for idx, vertex in enumerate(vertices):
+        graph.add_vertex(vertex, obj_type="created" if idx % 2 else "returned")
+    graph.change_type(vertices[1], "returned")
+
+    for objs, index in [
+        (graph.created_objs, graph.created_index),
+        (graph.returned_objs, graph.returned_index),
+        (graph.argument_objs, graph.argument_index),
+    ]:
+        assert index == {key: objs.index(key) for key in objs}
+
+
+def test_nested_index_follows_graph_changes():
+    graph = Graph()
+    v1, v2 = _Vertex(), _Vertex()
+    graph.add_vertex(v1, obj_type="created")
+    assert list(graph.created_index) == graph.created_objs == [graph.convert_id_to_key(v1)]
+    graph.add_vertex(v2, obj_type="created")
+    assert graph.created_objs == [graph.convert_id_to_key(v1), graph.convert_id_to_key(v2)]
+    graph.reset_type(v1, "created_internal")
+    assert graph.created_objs == [graph.convert_id_to_key(v2)]
+    assert graph.created_internal == [graph.convert_id_to_key(v1)]
+    graph.change_type(v2, "returned")
+    assert graph.returned_index == {graph.convert_id_to_key(v2): 0}
+    key = graph.convert_id_to_key(v2)
+    del v2
+    assert key not in graph.returned_index
+
+
+def test_entry_reset_type_reports_changes():
+    entry = _EntryList(my_type="created")
+    assert entry.reset_type("created_internal")
+    assert entry.type == ["created_internal"]
+    assert not entry.reset_type("created_internal")
+    entry.add_type("returned")
+    assert entry.reset_type("created_internal")
+    assert entry.type == ["created_internal"]
+
+
+def test_reset_type_keeps_index_when_unchanged():
+    graph = Graph()
+    v1 = _Vertex()
+    graph.add_vertex(v1, obj_type="created_internal")
+    index = graph.created_index
+    graph.reset_type(v1, "created_internal")
+    assert graph.created_index is index
+    graph.reset_type(v1, "created")
+    assert graph.created_index == {graph.convert_id_to_key(v1): 0}
+
+
+def test_classify_returned():
+    graph = Graph()
+    known, unknown = _Vertex(), _Vertex()
+    graph.add_vertex(known, obj_type="created")
+    graph.classify_returned([known, None, unknown])
+    known_key, unknown_key = graph.convert_id_to_key(known), graph.convert_id_to_key(unknown)
+    assert graph.created_objs == [known_key]
+    assert graph.returned_objs == [known_key, unknown_key]
+
+
+def test_is_known_and_id_conversion():
+    graph = Graph()
+    known, unknown = _Vertex(), _Vertex()
+    graph.add_vertex(known, obj_type="created")
+    assert graph.is_known(known)
+    assert not graph.is_known(unknown)
+    oid = graph.convert_id(known)
+    assert graph.convert_id(oid) is oid
+    assert graph.convert_id(str(oid)) == str(oid)
+    assert graph.convert_id_to_key(oid) == graph.convert_id_to_key(known) == oid.int
+    assert graph.get_item_by_key(oid.int) is known
+
+
+def test_generation_tracks_edge_changes():
+    graph = Graph()
+    parent, child = _Vertex(), _Vertex()
+    graph.add_vertex(parent, obj_type="created")
+    graph.add_vertex(child, obj_type="created")
+    generation = graph.generation
+    graph.change_type(child, "returned")
+    assert graph.generation == generation
+    graph.add_edge(parent, child)
+    assert graph.generation > generation
+    generation = graph.generation
+    graph.prune_vertex_from_edge(parent, child)
+    assert graph.generation > generation
+
+
+def test_bulk_lookups():
+    graph = Graph()
+    vertices = [_Vertex() for _ in range(3)]
+    for vertex in vertices:
+        graph.add_vertex(vertex, obj_type="created")
+    ids = graph.convert_ids(vertices)
+    assert ids == [graph.convert_id(vertex) for vertex in vertices]
+    assert graph.get_items_by_keys(oid.int for oid in reversed(ids)) == vertices[::-1]
+    with pytest.raises(ValueError):
+        graph.get_items_by_keys([graph.convert_id_to_key(_Vertex())])
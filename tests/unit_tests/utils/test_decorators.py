@@ -0,0 +1,71 @@
+__author__ = "github.com/wardsimon"
+__version__ = "0.0.1"
+
+#  SPDX-FileCopyrightText: 2023 easyCore contributors  <core@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2021-2023 Contributors to the easyCore project <https://github.com/easyScience/easyCore
+
+import logging
+
+from easyCore.Utils.decorators import memoized
+from easyCore.Utils.decorators import time_it
+
+
+def test_memoized_caches_results():
+    calls = []
+
+    @memoized
+    def f(x):
+        calls.append(x)
+        return None if x == 0 else x * 2
+
+    assert f(2) == 4
+    assert f(2) == 4
+    assert f(0) is None
+    assert f(0) is None
+    assert calls == [2, 0]
+    f.cache_clear()
+    assert f(2) == 4
+    assert calls == [2, 0, 2]
+
+
+def test_memoized_method():
+    class A:
+        @memoized
+        def double(self, x):
+            return x * 2
+
+    a = A()
+    assert a.double(3) == 6
+    assert A.double.cache_info().hits == 0
+    assert a.double(3) == 6
+    assert A.double.cache_info().hits == 1
+
+
+def test_memoized_unhashable_arguments():
+    calls = []
+
+    @memoized
+    def f(x):
+        calls.append(x)
+        return len(x)
+
+    assert f([1, 2]) == 2
+    assert f([1, 2]) == 2
+    assert len(calls) == 2
+    assert f.cache_info().currsize == 0
+
+
+def test_time_it_logs_at_debug(caplog):
+    @time_it
+    def f(x):
+        return x + 1
+
+    logger_name = "timer." + f.__module__ + "." + f.__name__
+    with caplog.at_level(logging.INFO, logger=logger_name):
+        assert f(1) == 2
+    assert not caplog.records
+    with caplog.at_level(logging.DEBUG, logger=logger_name):
+        assert f(1) == 2
+    assert len(caplog.records) == 1
+    assert "Execution time:" in caplog.records[0].getMessage()
@@ -0,0 +1,79 @@
+__author__ = "github.com/wardsimon"
+__version__ = "0.0.1"
+
+#  SPDX-FileCopyrightText: 2023 easyCore contributors  <core@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2021-2023 Contributors to the easyCore project <https://github.com/easyScience/easyCore
+
+import gc
+import weakref
+
+from easyCore import borg
+from easyCore.Utils.Hugger.Hugger import PatcherFactory
+from easyCore.Utils.Hugger.Property import PropertyHugger
+
+
+def test_caller_name_does_not_keep_callers_alive():
+    def make():
+        # A class per instance, as `easyCore` objects get
+        klass = type("PerInstance", (), {"who": lambda self: PatcherFactory._caller_name(skip=0)})
+        return klass()
+
+    obj = make()
+    assert obj.who().endswith("PerInstance.<lambda>")
+    ref = weakref.ref(type(obj))
+    del obj
+    gc.collect()
+    assert ref() is None
+
+
+class _Patched:
+    def __init__(self):
+        self._x = [1]
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+
+
+def test_property_hugger_logs_and_reset_history():
+    hugger = PropertyHugger(_Patched, "x")
+    borg.script.reset_history()
+    hugger.patch()
+    try:
+        obj = _Patched()
+        hugger._append_create(obj)
+        res = obj.x
+        new = [2]
+        obj.x = new
+        obj.x = res
+        obj.x = "s"
+        assert borg.script.history() == [
+            " = _patched_0.x\n",
+            "_patched_0.x = var_0\n",
+            "_patched_0.x = var_0\n",
+            '_patched_0.x = "s"\n',
+        ]
+        assert hugger._get_position("create_list", obj) == 0
+        assert hugger._get_position("return_list", res) == 0
+        assert hugger._get_position("input_list", new) == 0
+        assert hugger._get_position("input_list", res) is None
+
+        borg.script.reset_history()
+        store = hugger._store
+        assert borg.script.history() == []
+        for ids, index in (
+            ("create_list", "create_index"),
+            ("unique_args", "unique_args_index"),
+            ("unique_rets", "unique_rets_index"),
+        ):
+            assert len(getattr(store, ids)) == 0
+            assert len(getattr(store, index)) == 0
+        assert hugger._get_position("create_list", obj) is None
+    finally:
+        hugger.restore()
+        borg.script.reset_history()